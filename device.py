@@ -7,7 +7,11 @@ doesn't do a soft reset when a state requests a restart/exit via sys.exit().
 import time
 
 class Device:
-    def __init__(self):
+    def __init__(self, trace=None):
+        # voliteľný záznam behu (tracing.Recorder), zapnutý len na požiadanie
+        # nastavený ako prvý, lebo ho používa setter dht_sensor
+        self.trace = trace
+
         # základné členy, inicializované na None
         self.state = None
         self.settings = None
@@ -22,6 +26,17 @@ class Device:
         from states.init import Init
         self.state = Init(self)
 
+    @property
+    def dht_sensor(self):
+        return self._dht_sensor
+
+    @dht_sensor.setter
+    def dht_sensor(self, sensor):
+        # senzor sa obalí pri priradení, aj keď ho vytvorí až stav (Diagnostics)
+        if self.trace is not None:
+            sensor = self.trace.sensor(sensor)
+        self._dht_sensor = sensor
+
     def change_state(self, new_state):
         """
         new_state: inštancia AbstractState
@@ -38,6 +53,8 @@ class Device:
                     pass
         finally:
             self.state = new_state
+            if self.trace is not None:
+                self.trace.state(new_state)
 
     def run(self):
         """
@@ -50,6 +67,10 @@ class Device:
         Táto metóda ho zachytí a korektne ukončí run slučku bez opätovného reštartu
         (čo by na MicroPythone/mali by vyvolať soft reset).
         """
+        if self.trace is not None:
+            # záznam začína až teraz, keď sú nastavené senzory a nastavenia
+            self.trace.attach(self)
+
         while True:
             try:
                 if self.state is None:
@@ -92,3 +113,6 @@ class Device:
             # malé zdržanie, aby sa slučka nezabudla (a aby sa dal prerušiť)
             # na MicroPythone by ste použili time.sleep_ms(...)
             time.sleep(0.1)
+
+        if self.trace is not None:
+            self.trace.close()
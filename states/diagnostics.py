@@ -1,5 +1,5 @@
 from .state import AbstractState
-import time
+from .indicator import show_color
 
 class Diagnostics(AbstractState):
     """Diagnostics state: test DHT sensor availability and measured ranges.
@@ -19,17 +19,7 @@ class Diagnostics(AbstractState):
 
     def enter(self):
         # indicate diagnostics start if LED available
-        try:
-            if getattr(self.device, "led", None) is not None:
-                if hasattr(self.device.led, "set_color"):
-                    self.device.led.set_color("GREEN")
-                elif hasattr(self.device.led, "color"):
-                    try:
-                        self.device.led.color = "GREEN"
-                    except Exception:
-                        pass
-        except Exception:
-            pass
+        show_color(self.device, "GREEN")
 
     def exec(self):
         # helper to transition to Error state with optional code/message
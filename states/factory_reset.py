@@ -1,7 +1,7 @@
 from .state import AbstractState
+from .indicator import show_color
 import os
 import sys
-import time
 
 class FactoryReset(AbstractState):
     """FactoryReset state: remove user settings and restart the device.
@@ -17,18 +17,8 @@ class FactoryReset(AbstractState):
     """
 
     def enter(self):
-        # indicate factory reset start (try to set LED to ORANGE if available)
-        try:
-            if getattr(self.device, "led", None) is not None:
-                if hasattr(self.device.led, "set_color"):
-                    self.device.led.set_color("ORANGE")
-                elif hasattr(self.device.led, "color"):
-                    try:
-                        self.device.led.color = "ORANGE"
-                    except Exception:
-                        pass
-        except Exception:
-            pass
+        # indicate factory reset start (set LED to ORANGE if available)
+        show_color(self.device, "ORANGE")
 
     def exec(self):
         # perform reset actions
@@ -79,12 +69,6 @@ class FactoryReset(AbstractState):
         except Exception:
             pass
 
-        # small delay to allow LED change to be visible
-        try:
-            time.sleep(0.1)
-        except Exception:
-            pass
-
         # 5) request restart via SystemExit -> Device.run will handle it
         try:
             sys.exit(0)
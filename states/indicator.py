@@ -0,0 +1,24 @@
+"""indicator.py
+
+Spoločné ovládanie LED indikátora pre stavy.
+
+LED (napr. `hw.led.LedAnimator`) animuje sama z časovača, preto stavy len
+nastavia farbu a nikdy nečakajú na vizuálny efekt.
+"""
+
+
+def show_color(device, color):
+    """
+    Nastaví farbu na LED zariadenia, ak existuje.
+    Chyby LED/ovládača sú ignorované, aby neprerušili prechod stavov.
+    """
+    led = getattr(device, "led", None)
+    if led is None:
+        return
+    try:
+        if hasattr(led, "set_color"):
+            led.set_color(color)
+        elif hasattr(led, "color"):
+            led.color = color
+    except Exception:
+        pass
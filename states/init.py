@@ -1,4 +1,5 @@
 from .state import AbstractState
+from .indicator import show_color
 import time
 
 # Durations in seconds
@@ -16,20 +17,8 @@ class Init(AbstractState):
     """
 
     def enter(self):
-        # indicate startup: try to set LED to green
-        try:
-            if getattr(self.device, "led", None) is not None:
-                # prefer a set_color API if available
-                if hasattr(self.device.led, "set_color"):
-                    self.device.led.set_color("GREEN")
-                elif hasattr(self.device.led, "color"):
-                    try:
-                        self.device.led.color = "GREEN"
-                    except Exception:
-                        pass
-        except Exception:
-            # be resilient to any LED/driver errors
-            pass
+        # indicate startup: set LED to green
+        show_color(self.device, "GREEN")
 
     def exec(self):
         # 1) detect button long-press if device provides a method
@@ -55,16 +44,11 @@ class Init(AbstractState):
                     if start is None:
                         start = time.time()
                     hold_time = time.time() - start
-                    # change LED color at thresholds
-                    try:
-                        if hold_time >= LONG_PRESS_DURATION:
-                            if hasattr(self.device, "led") and hasattr(self.device.led, "set_color"):
-                                self.device.led.set_color("ORANGE")
-                        elif hold_time >= SHORT_PRESS_DURATION:
-                            if hasattr(self.device, "led") and hasattr(self.device.led, "set_color"):
-                                self.device.led.set_color("CYAN")
-                    except Exception:
-                        pass
+                    # change LED color at thresholds (unchanged color is not rewritten)
+                    if hold_time >= LONG_PRESS_DURATION:
+                        show_color(self.device, "ORANGE")
+                    elif hold_time >= SHORT_PRESS_DURATION:
+                        show_color(self.device, "CYAN")
                 else:
                     # button not pressed -> break the polling loop
                     break
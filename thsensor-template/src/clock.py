@@ -0,0 +1,282 @@
+"""
+Time service disciplining the MCU clock with the DS3231 RTC and NTP.
+
+Timestamps are computed from the MCU tick counter plus an offset, corrected by
+the estimated drift of the MCU clock. NTP is queried only when the resync
+interval expires; the interval doubles while the clock stays within tolerance
+and halves when it does not. The DS3231 serves as a fallback reference when the
+network is not available and is itself corrected against NTP.
+
+All time sources are injectable, so the service can be driven by simulated
+clocks on the host.
+"""
+import time
+
+from constants import DateTime
+
+# seconds between 1970-01-01 and 2000-01-01 (embedded epoch of older ports)
+EPOCH_2000_OFFSET = 946_684_800
+
+# bounds of the adaptive NTP resync interval (in seconds)
+MIN_SYNC_INTERVAL = 15 * 60
+MAX_SYNC_INTERVAL = 7 * 24 * 60 * 60
+
+# accepted clock error at resync (in ms); NTP and DS3231 have 1s resolution
+SYNC_TOLERANCE = 1000
+
+# ticks_ms() wraps on MicroPython, so the anchor is moved forward regularly
+ANCHOR_PERIOD = 24 * 60 * 60 * 1000
+
+try:
+    ticks_ms = time.ticks_ms
+    ticks_diff = time.ticks_diff
+except AttributeError:
+    # CPython fallback
+    def ticks_ms():
+        return int(time.monotonic() * 1000)
+
+    def ticks_diff(end, start):
+        return end - start
+
+
+def to_epoch(dt) -> int:
+    """
+    Convert the date and time to seconds since 1970-01-01 (UTC).
+
+    :param dt: The `DateTime` or RTC 8-tuple.
+    :return: The number of seconds since epoch.
+    """
+    year, month, day = dt[0], dt[1], dt[2]
+    year -= month <= 2
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month - 3 if month > 2 else month + 9) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    days = era * 146_097 + doe - 719_468
+    return days * 86_400 + dt[4] * 3600 + dt[5] * 60 + dt[6]
+
+
+def from_epoch(seconds: int, millisecond: int = 0) -> DateTime:
+    """
+    Convert seconds since 1970-01-01 (UTC) to the date and time.
+
+    :param seconds: The number of seconds since epoch.
+    :param millisecond: The millisecond part of the time.
+    :return: The `DateTime` with weekday starting with monday as 0.
+    """
+    days, rem = divmod(int(seconds), 86_400)
+    z = days + 719_468
+    era = z // 146_097
+    doe = z - era * 146_097
+    yoe = (doe - doe // 1460 + doe // 36_524 - doe // 146_096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    day = doy - (153 * mp + 2) // 5 + 1
+    month = mp + 3 if mp < 10 else mp - 9
+    year = yoe + era * 400 + (month <= 2)
+    # 1970-01-01 was thursday
+    weekday = (days + 3) % 7
+    return DateTime(year, month, day, weekday, rem // 3600, rem % 3600 // 60, rem % 60, millisecond)
+
+
+def ntp_time(host: str) -> int:
+    """
+    Query the NTP server.
+
+    :param host: The NTP server, usually `Settings.ntp_host`.
+    :return: The number of seconds since 1970-01-01 (UTC).
+    """
+    import ntptime
+
+    ntptime.host = host
+    seconds = ntptime.time()
+    if time.gmtime(0)[0] == 2000:
+        seconds += EPOCH_2000_OFFSET
+    return seconds
+
+
+class Clock:
+    """
+    Disciplined wall clock.
+
+    :param rtc: The RTC implementing `RTCMixin` (DS3231), optional.
+    :param ntp: The callable returning seconds since epoch from NTP, optional.
+    :param ticks: The callable returning the MCU clock in ms.
+    :param diff: The callable returning difference of two `ticks` values.
+    :param min_interval: The shortest NTP resync interval (in seconds).
+    :param max_interval: The longest NTP resync interval (in seconds).
+    :param tolerance: The accepted clock error at resync (in ms).
+    """
+
+    def __init__(self, rtc=None, ntp=None, ticks=ticks_ms, diff=ticks_diff,
+                 min_interval: int = MIN_SYNC_INTERVAL, max_interval: int = MAX_SYNC_INTERVAL,
+                 tolerance: int = SYNC_TOLERANCE):
+        self.rtc = rtc
+        self.ntp = ntp
+        self._ticks = ticks
+        self._diff = diff
+        self.min_interval = min_interval * 1000
+        self.max_interval = max_interval * 1000
+        self.tolerance = tolerance
+
+        # estimated drift (in ppb, positive when the clock is slow)
+        self.drift = 0
+        self.rtc_drift = 0
+        # current NTP resync interval (in ms)
+        self.interval = self.min_interval
+        # error of the clock found at the last resync (in ms)
+        self.error = 0
+        self.synced = False
+
+        # wall clock (in ms) at the MCU ticks anchor
+        self._anchor_ticks = ticks()
+        self._anchor_ms = 0
+        # MCU time elapsed since the last reference and at the last sync (in ms),
+        # `None` until the first sync is attempted
+        self._elapsed = 0
+        self._attempt = None
+        # number of drift estimates averaged so far
+        self._estimates = 0
+        # last reference readings of the wall clock and the RTC (in ms)
+        self._ref_ms = None
+        self._rtc_ref = None
+
+    def _advance(self):
+        # move the anchor to the current ticks, returns the current wall clock
+        now = self._ticks()
+        elapsed = self._diff(now, self._anchor_ticks)
+        self._anchor_ticks = now
+        self._anchor_ms += elapsed + elapsed * self.drift // 1_000_000_000
+        self._elapsed += elapsed
+        return self._anchor_ms
+
+    def now_ms(self) -> int:
+        """
+        Return the current wall clock in ms since epoch.
+        """
+        elapsed = self._diff(self._ticks(), self._anchor_ticks)
+        if elapsed >= ANCHOR_PERIOD:
+            return self._advance()
+        return self._anchor_ms + elapsed + elapsed * self.drift // 1_000_000_000
+
+    def timestamp(self) -> int:
+        """
+        Return the current wall clock in seconds since epoch.
+        """
+        return self.now_ms() // 1000
+
+    def now(self) -> DateTime:
+        """
+        Return the current date and time.
+        """
+        ms = self.now_ms()
+        return from_epoch(ms // 1000, ms % 1000)
+
+    def due(self) -> bool:
+        """
+        Check, if the NTP resync interval has expired.
+        """
+        if self._attempt is None:
+            return True
+        elapsed = self._elapsed + self._diff(self._ticks(), self._anchor_ticks)
+        return elapsed - self._attempt >= self.interval
+
+    def maybe_sync(self) -> bool:
+        """
+        Resync the clock if the resync interval has expired.
+
+        :return: `True` if the resync was done.
+        """
+        if not self.due():
+            return False
+        return self.sync()
+
+    def sync(self) -> bool:
+        """
+        Resync the clock with NTP, or with the RTC if NTP is not available.
+
+        :return: `True` if the clock was synced with NTP.
+        """
+        reference = None
+        if self.ntp is not None:
+            try:
+                start = self._ticks()
+                seconds = self.ntp()
+                # reply is expected in the middle of the round trip
+                reference = int(seconds * 1000) + self._diff(self._ticks(), start) // 2
+            except (OSError, IndexError):
+                reference = None
+
+        if reference is None:
+            # retry NTP after the shortest interval, meanwhile keep the clock close to the RTC
+            self.interval = self.min_interval
+            if self.sync_rtc():
+                self.synced = True
+            self._advance()
+            self._attempt = self._elapsed
+            return False
+
+        self._discipline(reference)
+        if self.rtc is not None:
+            self._discipline_rtc(reference)
+        return True
+
+    def sync_rtc(self) -> bool:
+        """
+        Resync the clock with the RTC, typically on boot before network is available.
+
+        :return: `True` if the RTC was read.
+        """
+        if self.rtc is None:
+            return False
+        try:
+            reference = to_epoch(self.rtc.datetime()) * 1000
+        except OSError:
+            return False
+        if self._rtc_ref is not None:
+            # correct the RTC by its drift estimated against NTP
+            rtc_elapsed = reference - self._rtc_ref[1]
+            reference += rtc_elapsed * self.rtc_drift // 1_000_000_000
+
+        self._advance()
+        if self.synced and abs(reference - self._anchor_ms) <= self.tolerance:
+            # clock disciplined by NTP is more precise than the 1s RTC resolution
+            return True
+        self._anchor_ms = reference
+        return True
+
+    def _discipline(self, reference: int):
+        predicted = self._advance()
+        elapsed = self._elapsed
+        self.error = reference - predicted
+
+        if self._ref_ms is not None and elapsed > 0:
+            # compare real time elapsed since the last reference against MCU time
+            drift = (reference - self._ref_ms - elapsed) * 1_000_000_000 // elapsed
+            self.drift = drift if self._estimates == 0 else (self.drift + drift) // 2
+            self._estimates += 1
+
+        if abs(self.error) <= self.tolerance:
+            self.interval = min(self.interval * 2, self.max_interval)
+        else:
+            self.interval = max(self.interval // 2, self.min_interval)
+
+        self._anchor_ms = reference
+        self._ref_ms = reference
+        self._elapsed = 0
+        self._attempt = 0
+        self.synced = True
+
+    def _discipline_rtc(self, reference: int):
+        try:
+            rtc_ms = to_epoch(self.rtc.datetime()) * 1000
+            if self._rtc_ref is not None and reference > self._rtc_ref[0]:
+                real = reference - self._rtc_ref[0]
+                self.rtc_drift = (real - (rtc_ms - self._rtc_ref[1])) * 1_000_000_000 // real
+
+            if abs(rtc_ms - reference) > self.tolerance:
+                self.rtc.datetime(from_epoch(reference // 1000))
+                rtc_ms = reference // 1000 * 1000
+            self._rtc_ref = (reference, rtc_ms)
+        except OSError:
+            pass
@@ -0,0 +1,244 @@
+"""
+MQTT command channel.
+
+Commands are received as JSON objects on `COMMAND_TOPIC`:
+
+    {"id": "42", "name": "set-interval", "params": {"interval": 120}}
+
+and the reply correlated by the command id is published on `REPLY_TOPIC`:
+
+    {"id": "42", "status": "ok", "result": {"interval": 120}}
+    {"id": "42", "status": "error", "error": "..."}
+
+The MQTT client is polled without blocking and at most `batch` commands are
+dispatched per poll, so handling commands does not stall sampling.
+"""
+import json
+
+from clock import ticks_ms, ticks_diff
+from constants import COMMAND_TOPIC, REPLY_TOPIC
+from models import Command
+
+# rate limit: number of commands accepted per period (in ms)
+RATE_LIMIT = 10
+RATE_PERIOD = 10 * 1000
+
+# max number of commands waiting for dispatch
+QUEUE_SIZE = 8
+
+# period of polling the MQTT client (in ms)
+POLL_PERIOD = 100
+
+
+class CommandChannel:
+    """
+    Receives commands over MQTT and dispatches them to handlers.
+
+    Commands `read-now` and `factory-reset` are available only if their action
+    is provided; further handlers can be added with `register()`.
+
+    :param client: The MQTT client with `umqtt.simple.MQTTClient` interface.
+    :param settings: The `Settings` changed by `set-interval`.
+    :param measure: The callable requesting immediate measurement, optional.
+    :param factory_reset: The callable requesting factory reset, optional.
+    :param rate: The number of commands accepted per `period`.
+    :param period: The rate limit period (in ms).
+    :param batch: The max number of commands dispatched per poll.
+    :param ticks: The callable returning the clock in ms.
+    :param diff: The callable returning difference of two `ticks` values.
+    """
+
+    def __init__(self, client, settings, measure=None, factory_reset=None,
+                 rate: int = RATE_LIMIT, period: int = RATE_PERIOD,
+                 batch: int = 1, ticks=ticks_ms, diff=ticks_diff):
+        self.client = client
+        self.settings = settings
+        self.rate = rate
+        self.period = period
+        self.batch = batch
+        self._ticks = ticks
+        self._diff = diff
+
+        # dispatch table is built once, lookup is a single dict access
+        self._handlers = {
+            'set-interval': self.set_interval,
+            'dump-stats': self.dump_stats,
+        }
+        if measure is not None:
+            self._handlers['read-now'] = lambda params: measure()
+        if factory_reset is not None:
+            self._handlers['factory-reset'] = lambda params: factory_reset()
+        self._queue = []
+
+        # token bucket: every command costs `period`, refilled by `rate` per ms
+        self._tokens = rate * period
+        self._refilled = ticks()
+
+        self.stats = {
+            'received': 0,
+            'dispatched': 0,
+            'failed': 0,
+            'invalid': 0,
+            'limited': 0,
+            'latency_max': 0,
+            'disconnects': 0,
+        }
+
+    def register(self, name: str, handler):
+        """
+        Add or replace the command handler.
+
+        :param name: The command name.
+        :param handler: The callable taking the command params, returning the result.
+        """
+        self._handlers[name] = handler
+
+    def subscribe(self):
+        """
+        Subscribe to the command topic.
+        """
+        self.client.set_callback(self._on_message)
+        self.client.subscribe(COMMAND_TOPIC)
+
+    def poll(self) -> int:
+        """
+        Check for incoming message without blocking and dispatch the queued commands.
+
+        :return: The number of dispatched commands.
+        """
+        self.client.check_msg()
+        count = 0
+        while self._queue and count < self.batch:
+            command, received = self._queue.pop(0)
+            self.dispatch(command, received)
+            count += 1
+        return count
+
+    def reconnect(self):
+        """
+        Reconnect the MQTT client to the broker and subscribe again.
+        """
+        self.client.connect()
+        self.subscribe()
+
+    async def run(self, period: int = POLL_PERIOD):
+        """
+        Poll the channel from asyncio task. On broker disconnect the client is
+        reconnected once per period until it succeeds.
+
+        :param period: The polling period (in ms).
+        """
+        import asyncio
+
+        connected = True
+        while True:
+            try:
+                if not connected:
+                    self.reconnect()
+                    connected = True
+                self.poll()
+            except OSError:
+                if connected:
+                    self.stats['disconnects'] += 1
+                connected = False
+            await asyncio.sleep(period / 1000)
+
+    def dispatch(self, command: Command, received: int = None):
+        """
+        Run the command handler and publish the reply.
+
+        :param command: The command.
+        :param received: The ticks when the command was received.
+        """
+        handler = self._handlers.get(command.name)
+        if handler is None:
+            self.stats['invalid'] += 1
+            self.reply(command.id, error=f'Command "{command.name}" is unknown.')
+            return
+
+        try:
+            result = handler(command.params or {})
+        except Exception as e:
+            # failed handler must not stop the polling loop
+            self.stats['failed'] += 1
+            self.reply(command.id, error=f'{e.__class__.__name__}: {e}')
+        else:
+            self.stats['dispatched'] += 1
+            self.reply(command.id, result=result)
+
+        if received is not None:
+            latency = self._diff(self._ticks(), received)
+            if latency > self.stats['latency_max']:
+                self.stats['latency_max'] = latency
+
+    def reply(self, command_id: str, result=None, error: str = None):
+        """
+        Publish the reply to the command.
+
+        :param command_id: The id of the command.
+        :param result: The result of successful command.
+        :param error: The error message of failed command.
+        """
+        if error is None:
+            message = {'id': command_id, 'status': 'ok', 'result': result}
+        else:
+            message = {'id': command_id, 'status': 'error', 'error': error}
+        self.client.publish(REPLY_TOPIC, json.dumps(message))
+
+    def _allow(self, now: int) -> bool:
+        capacity = self.rate * self.period
+        self._tokens = min(capacity, self._tokens + self._diff(now, self._refilled) * self.rate)
+        self._refilled = now
+        if self._tokens < self.period:
+            return False
+        self._tokens -= self.period
+        return True
+
+    def _on_message(self, topic, msg):
+        # called from client.check_msg(), only parses and queues the command
+        now = self._ticks()
+        self.stats['received'] += 1
+        try:
+            data = json.loads(msg)
+            command_id = data.get('id')
+        except (ValueError, AttributeError):
+            data = command_id = None
+        if not isinstance(command_id, str) or not command_id:
+            # command without valid id can not be replied to
+            self.stats['invalid'] += 1
+            return
+
+        try:
+            command = Command(**data)
+            if command.name is None:
+                raise ValueError('Command name is required.')
+        except (ValueError, TypeError, AttributeError) as e:
+            self.stats['invalid'] += 1
+            self.reply(command_id, error=str(e))
+            return
+
+        # full queue is checked first, so the rejected command does not use up a token
+        if len(self._queue) >= QUEUE_SIZE:
+            self.stats['limited'] += 1
+            self.reply(command.id, error='Command queue is full.')
+        elif not self._allow(now):
+            self.stats['limited'] += 1
+            self.reply(command.id, error='Rate limit exceeded.')
+        else:
+            self._queue.append((command, now))
+
+    # default handlers
+
+    def set_interval(self, params: dict) -> dict:
+        settings = self.settings
+        previous = settings.measurement_interval
+        try:
+            # type and range are checked by `Settings` validators
+            settings.measurement_interval = params['interval']
+        except ValueError:
+            settings.measurement_interval = previous
+            raise
+        return {'interval': settings.measurement_interval}
+
+    def dump_stats(self, params: dict) -> dict:
+        return dict(self.stats, queued=len(self._queue))
@@ -28,6 +28,10 @@ SHORT_PRESS_DURATION = 3 * 1000  # for web portal
 SENSOR_SSID = f'thsensor-{DEVICE_ID}'
 SENSOR_WIFI_PASSWORD = 'thsensor'
 
+# MQTT topics for incoming commands and their replies
+COMMAND_TOPIC = f'thsensor/{DEVICE_ID}/cmd'
+REPLY_TOPIC = f'thsensor/{DEVICE_ID}/reply'
+
 
 # temperature units
 class TempUnit:
@@ -48,6 +52,14 @@ class Color:
     OFF: tuple = (0, 0, 0)
 
 
+# animation patterns for the NeoPixel LED
+class Pattern:
+    SOLID: str = 'solid'
+    BLINK: str = 'blink'
+    PULSE: str = 'pulse'
+    ERROR_CODE: str = 'error_code'
+
+
 # named tuple for datetime representation
 DateTime = collections.namedtuple(
     "DateTime", [
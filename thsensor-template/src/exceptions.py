@@ -4,3 +4,7 @@ class SmartDeviceError(Exception):
     
 class SettingsError(SmartDeviceError):
     pass
+
+
+class SensorError(SmartDeviceError):
+    pass
@@ -0,0 +1,143 @@
+"""
+BME280 temperature, humidity and pressure sensor on I2C bus.
+
+The sensor runs in normal mode, so the latest conversion is always available
+without waiting. All data registers are fetched in a single burst transaction
+into a preallocated buffer, calibration is read once on initialization.
+"""
+import struct
+
+from constants import I2C_SCL_PIN, I2C_SDA_PIN
+from exceptions import SensorError
+from .mixins import TemperatureMixin, HumidityMixin, PressureMixin, convert_temperature
+
+BME280_ADDR = 0x76
+BME280_CHIP_ID = 0x60
+
+# registers
+REG_CALIB_TP = 0x88  # 0x88..0xA1, temperature/pressure calibration and dig_H1
+REG_CALIB_H = 0xE1  # 0xE1..0xE7, humidity calibration
+REG_CHIP_ID = 0xD0
+REG_CTRL_HUM = 0xF2
+REG_CTRL_MEAS = 0xF4
+REG_CONFIG = 0xF5
+REG_DATA = 0xF7  # 0xF7..0xFE, pressure, temperature and humidity
+
+# oversampling x1 for all channels, normal mode, 1000ms standby
+CTRL_HUM = 0x01
+CTRL_MEAS = 0x27
+CONFIG = 0xA0
+
+
+def create_i2c(bus_id: int = 0, freq: int = 400_000):
+    """
+    Create I2C bus on the pins from `constants`.
+    """
+    from machine import I2C, Pin
+    return I2C(bus_id, scl=Pin(I2C_SCL_PIN), sda=Pin(I2C_SDA_PIN), freq=freq)
+
+
+class BME280(TemperatureMixin, HumidityMixin, PressureMixin):
+    """
+    :param i2c: The I2C bus.
+    :param address: The I2C address of the sensor.
+    :param name: The sensor name in metrics, `bme280_<address>` if not provided.
+    """
+    units: dict = {'temperature': 'C', 'humidity': '%', 'pressure': 'hPa'}
+    # the conversion runs continuously, so the sensor can be read at any time
+    period: int = 0
+    # expected duration of read (in ms)
+    cost: int = 1
+
+    def __init__(self, i2c, address: int = BME280_ADDR, name: str = None):
+        self.i2c = i2c
+        self.address = address
+        self.name = name or f'bme280_{address:02x}'
+        self._buf = bytearray(8)
+
+        try:
+            chip_id = i2c.readfrom_mem(address, REG_CHIP_ID, 1)[0]
+            calib = i2c.readfrom_mem(address, REG_CALIB_TP, 26)
+            calib_h = i2c.readfrom_mem(address, REG_CALIB_H, 7)
+        except OSError as e:
+            raise SensorError(f'BME280 not found at 0x{address:02x}.') from e
+        if chip_id != BME280_CHIP_ID:
+            raise SensorError(f'Unexpected chip id 0x{chip_id:02x} at 0x{address:02x}.')
+
+        (self._t1, self._t2, self._t3,
+         self._p1, self._p2, self._p3, self._p4, self._p5,
+         self._p6, self._p7, self._p8, self._p9) = struct.unpack_from('<HhhHhhhhhhhh', calib)
+        self._h1 = calib[25]
+        self._h2, self._h3 = struct.unpack_from('<hB', calib_h)
+        e4, e5, e6, h6 = calib_h[3], calib_h[4], calib_h[5], calib_h[6]
+        self._h4 = _signed12((e4 << 4) | (e5 & 0x0F))
+        self._h5 = _signed12((e6 << 4) | (e5 >> 4))
+        self._h6 = h6 - 256 if h6 > 127 else h6
+
+        # ctrl_hum is applied only after write to ctrl_meas
+        i2c.writeto_mem(address, REG_CTRL_HUM, bytes((CTRL_HUM,)))
+        i2c.writeto_mem(address, REG_CONFIG, bytes((CONFIG,)))
+        i2c.writeto_mem(address, REG_CTRL_MEAS, bytes((CTRL_MEAS,)))
+
+    def read(self) -> dict:
+        """
+        Read all channels in one burst transaction.
+
+        :return: The temperature (C), humidity (%) and pressure (hPa).
+        """
+        buf = self._buf
+        self.i2c.readfrom_mem_into(self.address, REG_DATA, buf)
+        adc_p = (buf[0] << 12) | (buf[1] << 4) | (buf[2] >> 4)
+        adc_t = (buf[3] << 12) | (buf[4] << 4) | (buf[5] >> 4)
+        adc_h = (buf[6] << 8) | buf[7]
+
+        t_fine = self._t_fine(adc_t)
+        return {
+            'temperature': ((t_fine * 5 + 128) >> 8) / 100,
+            'humidity': self._humidity(adc_h, t_fine) / 1024,
+            'pressure': self._pressure(adc_p, t_fine) / 25600,
+        }
+
+    def read_temperature(self, units='standard') -> float:
+        return convert_temperature(self.read()['temperature'], units)
+
+    def read_humidity(self):
+        return self.read()['humidity']
+
+    def read_pressure(self):
+        return self.read()['pressure']
+
+    # compensation formulas from the BME280 datasheet (integer variants)
+
+    def _t_fine(self, adc_t: int) -> int:
+        var1 = (((adc_t >> 3) - (self._t1 << 1)) * self._t2) >> 11
+        var2 = (((((adc_t >> 4) - self._t1) * ((adc_t >> 4) - self._t1)) >> 12) * self._t3) >> 14
+        return var1 + var2
+
+    def _pressure(self, adc_p: int, t_fine: int) -> int:
+        var1 = t_fine - 128000
+        var2 = var1 * var1 * self._p6
+        var2 += (var1 * self._p5) << 17
+        var2 += self._p4 << 35
+        var1 = ((var1 * var1 * self._p3) >> 8) + ((var1 * self._p2) << 12)
+        var1 = (((1 << 47) + var1) * self._p1) >> 33
+        if var1 == 0:
+            return 0
+        p = 1048576 - adc_p
+        p = (((p << 31) - var2) * 3125) // var1
+        var1 = (self._p9 * (p >> 13) * (p >> 13)) >> 25
+        var2 = (self._p8 * p) >> 19
+        return ((p + var1 + var2) >> 8) + (self._p7 << 4)
+
+    def _humidity(self, adc_h: int, t_fine: int) -> int:
+        v = t_fine - 76800
+        v = (((((adc_h << 14) - (self._h4 << 20) - (self._h5 * v)) + 16384) >> 15)
+             * (((((((v * self._h6) >> 10) * (((v * self._h3) >> 11) + 32768)) >> 10)
+                  + 2097152) * self._h2 + 8192) >> 14))
+        v -= ((((v >> 15) * (v >> 15)) >> 7) * self._h1) >> 4
+        v = min(max(v, 0), 419430400)
+        return v >> 12
+
+
+def _signed12(value: int) -> int:
+    return value - 4096 if value & 0x800 else value
@@ -0,0 +1,122 @@
+"""
+Sensor bus reading all registered sensors in one sampling cycle.
+
+Each sensor provides `name`, `units`, `period` (min time between reads in ms),
+`cost` (expected read duration in ms) and `read()` returning the values by
+metric name. Sensors which are not due yet, or which would not fit into the
+cycle deadline, are staggered to a later cycle and their last values are
+reused, so every cycle emits a single complete `Payload`. Metrics are always
+in the order of registration; values of a sensor which failed to read are `None`.
+"""
+from clock import ticks_ms, ticks_diff
+from models import Payload, Metric
+
+# time budget of one sampling cycle (in ms)
+CYCLE_DEADLINE = 50
+
+
+class _Slot:
+    def __init__(self, sensor):
+        self.sensor = sensor
+        self.cost = sensor.cost
+        self.last_read = None
+        self.metrics = self.missing()
+
+    def missing(self) -> list:
+        # metrics of the sensor without values, keeps the columns fixed
+        return [Metric(sensor=self.sensor.name, name=name, unit=unit) for name, unit in self.sensor.units.items()]
+
+
+class SensorBus:
+    """
+    :param clock: The `Clock` providing timestamps, optional.
+    :param deadline: The time budget of one sampling cycle (in ms).
+    :param ticks: The callable returning the clock in ms.
+    :param diff: The callable returning difference of two `ticks` values.
+    """
+
+    def __init__(self, clock=None, deadline: int = CYCLE_DEADLINE, ticks=ticks_ms, diff=ticks_diff):
+        self.clock = clock
+        self.deadline = deadline
+        self.sinks = []
+        self._ticks = ticks
+        self._diff = diff
+        # registration order (payload) and read order (least recently read first)
+        self._slots = []
+        self._order = []
+
+        self.stats = {
+            'cycles': 0,
+            'latency': 0,
+            'latency_max': 0,
+            'deferred': 0,
+            'errors': 0,
+        }
+
+    def register(self, sensor):
+        """
+        Add the sensor to the bus.
+        """
+        slot = _Slot(sensor)
+        self._slots.append(slot)
+        self._order.append(slot)
+
+    def sample(self) -> Payload:
+        """
+        Run one sampling cycle and emit the combined reading to all sinks.
+
+        :return: The combined reading.
+        """
+        start = self._ticks()
+        # least recently read sensors go first, so deferred ones are not starved
+        self._order.sort(key=lambda slot: -(1 << 30) if slot.last_read is None else self._diff(slot.last_read, start))
+
+        reads = 0
+        for slot in self._order:
+            now = self._ticks()
+            if slot.last_read is not None and self._diff(now, slot.last_read) < slot.sensor.period:
+                continue
+            # the first read of the cycle is always done, so slow sensor is not starved
+            if (slot.last_read is not None and reads
+                    and self._diff(now, start) + slot.cost > self.deadline):
+                self.stats['deferred'] += 1
+                continue
+
+            try:
+                values = slot.sensor.read()
+            except Exception:
+                # failed sensor must not abort the cycle
+                self.stats['errors'] += 1
+                # last values must not be published as current ones
+                if slot.metrics and slot.metrics[0].value is not None:
+                    slot.metrics = slot.missing()
+                continue
+
+            reads += 1
+            end = self._ticks()
+            # running estimate of the read duration
+            slot.cost = (slot.cost + self._diff(end, now)) // 2
+            slot.last_read = now
+            sensor = slot.sensor
+            slot.metrics = [
+                Metric(sensor=sensor.name, name=name, value=value, unit=sensor.units.get(name))
+                for name, value in values.items()
+            ]
+
+        metrics = []
+        for slot in self._slots:
+            metrics.extend(slot.metrics)
+        payload = Payload(
+            timestamp=self.clock.timestamp() if self.clock is not None else None,
+            metrics=metrics,
+        )
+
+        latency = self._diff(self._ticks(), start)
+        self.stats['cycles'] += 1
+        self.stats['latency'] = latency
+        if latency > self.stats['latency_max']:
+            self.stats['latency_max'] = latency
+
+        for sink in self.sinks:
+            sink(payload)
+        return payload
@@ -0,0 +1,50 @@
+"""
+DHT11/22 temperature and humidity sensor.
+"""
+from constants import DHT_PIN
+from exceptions import SensorError
+from .mixins import TemperatureMixin, HumidityMixin, convert_temperature
+
+
+class DHTSensor(TemperatureMixin, HumidityMixin):
+    """
+    :param pin: The GPIO pin the sensor is connected to.
+    :param sensor: The `dht.DHT22` instance, created from `pin` if not provided.
+    :param name: The sensor name in metrics, `dht_<pin>` if not provided.
+    """
+    units: dict = {'temperature': 'C', 'humidity': '%'}
+    # min time between reads (in ms); DHT11 needs 1s, DHT22 2s
+    period: int = 2000
+    # expected duration of read (in ms), the measurement is bit-banged
+    cost: int = 25
+
+    def __init__(self, pin: int = DHT_PIN, sensor=None, name: str = None):
+        self.name = name or f'dht_{pin}'
+        if sensor is None:
+            from dht import DHT22
+            from machine import Pin
+            sensor = DHT22(Pin(pin, Pin.IN))
+        self.sensor = sensor
+
+    def read(self) -> dict:
+        """
+        Measure and read both channels.
+
+        :return: The temperature (C) and humidity (%).
+        :raises SensorError: If the measurement failed (timeout, checksum error).
+        """
+        try:
+            self.sensor.measure()
+            return {
+                'temperature': self.sensor.temperature(),
+                'humidity': self.sensor.humidity(),
+            }
+        except Exception as e:
+            # the driver raises OSError on timeout, but plain Exception on checksum error
+            raise SensorError(f'DHT measurement failed: {e}') from e
+
+    def read_temperature(self, units='standard') -> float:
+        return convert_temperature(self.read()['temperature'], units)
+
+    def read_humidity(self):
+        return self.read()['humidity']
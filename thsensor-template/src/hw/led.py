@@ -0,0 +1,196 @@
+"""
+NeoPixel LED driver and non-blocking animation engine.
+
+The animation is advanced by `LedAnimator.update()`, which is called either from
+a hardware timer (`start()`) or from an asyncio task (`run()`), so states never
+need to sleep for a visual effect.
+"""
+from clock import ticks_ms, ticks_diff
+from constants import Color, NP_PIN, Pattern
+
+# animation frame period (in ms)
+FRAME_PERIOD = 20
+
+# default period of blink and pulse patterns (in ms)
+PATTERN_PERIOD = 1000
+
+# error code timing: blink on/off duration and pause between sequences (in ms)
+CODE_BLINK = 200
+CODE_PAUSE = 1000
+
+# number of brightness levels of the pulse pattern
+PULSE_LEVELS = 32
+
+
+class NeoPixelLED:
+    """
+    Single NeoPixel LED. The color is written only if it has changed.
+
+    :param pin: The GPIO pin the NeoPixel is connected to.
+    :param np: The `NeoPixel` instance, created from `pin` if not provided.
+    """
+
+    def __init__(self, pin: int = NP_PIN, np=None):
+        if np is None:
+            from machine import Pin
+            from neopixel import NeoPixel
+            np = NeoPixel(Pin(pin, Pin.OUT), 1)
+        self._np = np
+        self._color = None
+
+    @property
+    def color(self) -> tuple:
+        return self._color
+
+    def write(self, color: tuple) -> bool:
+        """
+        Write the color to the LED.
+
+        :param color: The RGB tuple.
+        :return: `True` if the LED was written.
+        """
+        if color == self._color:
+            return False
+        self._np[0] = color
+        self._np.write()
+        self._color = color
+        return True
+
+
+def _scale(color: tuple, level: int) -> tuple:
+    return (color[0] * level // PULSE_LEVELS,
+            color[1] * level // PULSE_LEVELS,
+            color[2] * level // PULSE_LEVELS)
+
+
+class LedAnimator:
+    """
+    Animation engine playing patterns from `constants.Pattern` on the LED.
+
+    :param led: The LED with `write(color)` method, e.g. `NeoPixelLED`.
+    :param ticks: The callable returning the clock in ms.
+    :param diff: The callable returning difference of two `ticks` values.
+    """
+
+    def __init__(self, led, ticks=ticks_ms, diff=ticks_diff):
+        self.led = led
+        self._ticks = ticks
+        self._diff = diff
+        self._timer = None
+        self._color = Color.OFF
+        self._pattern = Pattern.SOLID
+        self._period = PATTERN_PERIOD
+        self._code = 0
+        self._start = ticks()
+
+    @property
+    def color(self) -> tuple:
+        return self._color
+
+    @color.setter
+    def color(self, color):
+        self.set_color(color)
+
+    def set_color(self, color):
+        """
+        Show the color permanently.
+
+        :param color: The RGB tuple or name of the `Color` constant.
+        """
+        self.play(color, Pattern.SOLID)
+
+    def play(self, color, pattern: str = Pattern.SOLID, period: int = PATTERN_PERIOD, code: int = 0):
+        """
+        Start playing the pattern. Playing the same pattern again does not restart it.
+
+        :param color: The RGB tuple or name of the `Color` constant.
+        :param pattern: The pattern from `constants.Pattern`.
+        :param period: The period of blink and pulse patterns (in ms).
+        :param code: The number of blinks of the error code pattern.
+        :raises ValueError: If the pattern, period (< 2ms) or code (< 1) is invalid.
+        """
+        if isinstance(color, str):
+            color = getattr(Color, color.upper())
+        if pattern not in (Pattern.SOLID, Pattern.BLINK, Pattern.PULSE, Pattern.ERROR_CODE):
+            raise ValueError(f'Pattern "{pattern}" is invalid.')
+        # checked here, so the error is raised in the caller and not in the timer callback
+        if pattern in (Pattern.BLINK, Pattern.PULSE) and period < 2:
+            raise ValueError(f'Period "{period}" is invalid.')
+        if pattern == Pattern.ERROR_CODE and code < 1:
+            raise ValueError(f'Error code "{code}" is invalid.')
+
+        if (color, pattern, period, code) == (self._color, self._pattern, self._period, self._code):
+            return
+
+        self._color = color
+        self._pattern = pattern
+        self._period = period
+        self._code = code
+        self._start = self._ticks()
+        self.update()
+
+    def frame(self, elapsed: int) -> tuple:
+        """
+        Return the color of the current pattern at the given time.
+
+        :param elapsed: The time since the pattern was started (in ms).
+        """
+        pattern = self._pattern
+        if pattern == Pattern.SOLID:
+            return self._color
+
+        if pattern == Pattern.BLINK:
+            return self._color if elapsed % self._period < self._period // 2 else Color.OFF
+
+        if pattern == Pattern.PULSE:
+            half = self._period // 2
+            phase = elapsed % self._period
+            if phase >= half:
+                phase = self._period - phase
+            # odd period: the falling phase can exceed `half` by one
+            return _scale(self._color, min(phase * PULSE_LEVELS // half, PULSE_LEVELS))
+
+        # error code: blink `code` times, then pause
+        phase = elapsed % (self._code * 2 * CODE_BLINK + CODE_PAUSE)
+        if phase < self._code * 2 * CODE_BLINK and phase % (2 * CODE_BLINK) < CODE_BLINK:
+            return self._color
+        return Color.OFF
+
+    def update(self, *args):
+        """
+        Advance the animation and write the LED if the color has changed.
+        """
+        self.led.write(self.frame(self._diff(self._ticks(), self._start)))
+
+    def start(self, timer_id: int = -1, period: int = FRAME_PERIOD):
+        """
+        Drive the animation from the hardware timer.
+
+        :param timer_id: The timer id, -1 for virtual timer.
+        :param period: The frame period (in ms).
+        """
+        from machine import Timer
+
+        self.stop()
+        self._timer = Timer(timer_id)
+        self._timer.init(mode=Timer.PERIODIC, period=period, callback=self.update)
+
+    def stop(self):
+        """
+        Stop the hardware timer.
+        """
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+
+    async def run(self, period: int = FRAME_PERIOD):
+        """
+        Drive the animation from asyncio task.
+
+        :param period: The frame period (in ms).
+        """
+        import asyncio
+
+        while True:
+            self.update()
+            await asyncio.sleep(period / 1000)
@@ -1,4 +1,22 @@
 #
+from constants import TempUnit
+
+
+def convert_temperature(celsius: float, units: str = TempUnit.STANDARD) -> float:
+    """
+    Convert the temperature from degrees Celsius to the given units.
+
+    :param celsius: The temperature in degrees Celsius.
+    :param units: The `TempUnit` - kelvin (standard), celsius (metric) or fahrenheit (imperial).
+    :return: The converted temperature.
+    """
+    if units == TempUnit.METRIC:
+        return celsius
+    if units == TempUnit.IMPERIAL:
+        return celsius * 9 / 5 + 32
+    return celsius + 273.15
+
+
 class TemperatureMixin:
     def read_temperature(self, units='standard') -> float:
         raise NotImplementedError()
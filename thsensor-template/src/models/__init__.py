@@ -1,2 +1,4 @@
 from .udataclasses import Dataclass
 from .settings import Settings
+from .command import Command
+from .payload import Payload, Metric
@@ -0,0 +1,22 @@
+from .udataclasses import Dataclass, validator
+
+
+class Command(Dataclass):
+    id: str = None
+    name: str = None
+    params: dict = None
+
+    @validator('id')
+    def check_id(self, value):
+        if not isinstance(value, str) or not value:
+            raise ValueError(f'Command id "{value}" is invalid.')
+
+    @validator('name')
+    def check_name(self, value):
+        if not isinstance(value, str) or not value:
+            raise ValueError(f'Command name "{value}" is invalid.')
+
+    @validator('params')
+    def check_params(self, value):
+        if not isinstance(value, dict):
+            raise ValueError(f'Command params "{value}" are not an object.')
@@ -0,0 +1,15 @@
+from .udataclasses import Dataclass
+from constants import DEVICE_ID
+
+
+class Metric(Dataclass):
+    sensor: str = None
+    name: str = None
+    value: float = None
+    unit: str = None
+
+
+class Payload(Dataclass):
+    device_id: str = DEVICE_ID
+    timestamp: int = None
+    metrics: list = None
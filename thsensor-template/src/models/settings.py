@@ -30,3 +30,8 @@ class Settings(Dataclass):
     def check_units(self, value):
         if value not in (TempUnit.METRIC, TempUnit.STANDARD, TempUnit.IMPERIAL):
             raise ValueError(f'Unit "{value}" is invalid.')
+
+    @validator('measurement_interval')
+    def check_measurement_interval(self, value):
+        if isinstance(value, bool) or value < 1:
+            raise ValueError(f'Measurement interval "{value}" is invalid.')
@@ -32,7 +32,8 @@ class Dataclass:
             # get validators
             if callable(value) is True and getattr(value, "_is_validator", False) is True:
                 field = value._field
-                self.__class__.__validators.setdefault(field, []).append(value)
+                # getattr() avoids name mangling of `__validators` on CPython
+                getattr(self.__class__, '__validators').setdefault(field, []).append(value)
 
         # update fields with kwargs
         for field, value in kwargs.items():
@@ -86,8 +87,10 @@ class Dataclass:
             if isinstance(value, Dataclass):
                 result[field] = value.model_dump()
             elif isinstance(value, list):
-                for entry in value:
-                    result[field] = entry.model_dump()
+                result[field] = [
+                    entry.model_dump() if isinstance(entry, Dataclass) else entry
+                    for entry in value
+                ]
             else:
                 result[field] = value
         
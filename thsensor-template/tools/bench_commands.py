@@ -0,0 +1,106 @@
+"""
+Host-side benchmark of the MQTT command channel.
+
+Commands are sent through a loopback broker stand-in while the main loop
+interleaves polling of the channel with simulated sampling. Reports the
+command round-trip latency and the longest poll, i.e. how long a command
+can stall sampling.
+
+    python tools/bench_commands.py [polls] [rate limit per second] [load in %]
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from commands import CommandChannel  # noqa: E402
+from constants import COMMAND_TOPIC  # noqa: E402
+from models import Settings  # noqa: E402
+
+
+class LoopbackBroker:
+    """
+    MQTT client stand-in: published commands are delivered on `check_msg()`,
+    replies are timestamped on `publish()`.
+    """
+
+    def __init__(self):
+        self.inbox = []
+        self.replies = []
+        self._callback = None
+
+    def set_callback(self, callback):
+        self._callback = callback
+
+    def subscribe(self, topic):
+        self.topic = topic
+
+    def check_msg(self):
+        # umqtt.simple delivers at most one message per call
+        if self.inbox:
+            self._callback(COMMAND_TOPIC.encode(), self.inbox.pop(0))
+
+    def publish(self, topic, msg):
+        self.replies.append((time.perf_counter(), json.loads(msg)))
+
+    def send(self, message: dict):
+        self.inbox.append(json.dumps(message).encode())
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main(polls=10000, rate=10000, load=50):
+    broker = LoopbackBroker()
+    measurements = []
+    channel = CommandChannel(broker, Settings(), measure=lambda: measurements.append(1),
+                             factory_reset=lambda: None, rate=rate, period=1000)
+    channel.subscribe()
+
+    commands = [
+        ('read-now', {}),
+        ('set-interval', {'interval': 30}),
+        ('set-interval', {'interval': 0}),
+        ('dump-stats', {}),
+        ('unknown', {}),
+    ]
+    random.seed(1)
+    sent = {}
+    poll_max = 0
+    for i in range(polls):
+        # a command arrives before `load` % of polls
+        if random.randrange(100) < load:
+            name, params = random.choice(commands)
+            command_id = str(len(sent))
+            sent[command_id] = time.perf_counter()
+            broker.send({'id': command_id, 'name': name, 'params': params})
+
+        start = time.perf_counter()
+        channel.poll()
+        poll_max = max(poll_max, time.perf_counter() - start)
+
+        # simulated sampling work between polls
+        sum(range(200))
+
+    while broker.inbox or channel._queue:
+        channel.poll()
+
+    latencies = sorted((at - sent[reply['id']]) * 1e6 for at, reply in broker.replies)
+    statuses = {}
+    for _, reply in broker.replies:
+        statuses[reply['status']] = statuses.get(reply['status'], 0) + 1
+
+    print(f'commands sent:   {len(sent)}')
+    print(f'replies:         {len(broker.replies)} {statuses}')
+    print(f'round trip [us]: p50 {percentile(latencies, 0.5):.1f}  '
+          f'p99 {percentile(latencies, 0.99):.1f}  max {latencies[-1]:.1f}')
+    print(f'longest poll [us]: {poll_max * 1e6:.1f}')
+    print(f'channel stats:   {channel.stats}')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,130 @@
+"""
+Host-side benchmark of the sensor bus with simulated I2C devices.
+
+Checks the BME280 compensation against the reference values from the
+datasheet, then runs sampling cycles with a simulated DHT22 and two BME280
+on a fake I2C bus and reports the per-cycle latency and I2C transactions.
+
+    python tools/bench_sensors.py [cycles] [deadline in ms]
+"""
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from hw.bme280 import BME280, BME280_ADDR, BME280_CHIP_ID, REG_CALIB_TP, REG_CALIB_H, REG_CHIP_ID, REG_DATA  # noqa: E402
+from hw.bus import SensorBus  # noqa: E402
+from hw.dhtsensor import DHTSensor  # noqa: E402
+
+# calibration and raw readings of the compensation example in the BME280 datasheet
+CALIB_TP = (27504, 26435, -1000, 36477, -10685, 3024, 2855, 140, -7, 15500, -14600, 6000)
+ADC_T = 519888
+ADC_P = 415148
+EXPECTED_TEMPERATURE = 25.08  # C
+EXPECTED_PRESSURE = 100653  # Pa
+
+# humidity calibration and raw reading of a typical sensor
+CALIB_H = bytes((0x6A, 0x01, 0x00, 0x13, 0x2F, 0x03, 0x1E))
+ADC_H = 27000
+
+# simulated duration of transactions (in s)
+I2C_TRANSACTION = 0.0002
+DHT_MEASURE = 0.02
+
+
+class FakeI2C:
+    """
+    I2C bus stand-in with register maps of the attached devices.
+    """
+
+    def __init__(self):
+        self.devices = {}
+        self.transactions = 0
+
+    def attach(self, address: int, registers: dict):
+        self.devices[address] = registers
+
+    def _registers(self, address):
+        if address not in self.devices:
+            raise OSError(19)  # ENODEV
+        self.transactions += 1
+        time.sleep(I2C_TRANSACTION)
+        return self.devices[address]
+
+    def readfrom_mem(self, address, register, length):
+        registers = self._registers(address)
+        return bytes(registers.get(register + i, 0) for i in range(length))
+
+    def readfrom_mem_into(self, address, register, buf):
+        registers = self._registers(address)
+        for i in range(len(buf)):
+            buf[i] = registers.get(register + i, 0)
+
+    def writeto_mem(self, address, register, data):
+        registers = self._registers(address)
+        for i, value in enumerate(data):
+            registers[register + i] = value
+
+
+def bme280_registers() -> dict:
+    registers = {REG_CHIP_ID: BME280_CHIP_ID}
+    calib = struct.pack('<HhhHhhhhhhhh', *CALIB_TP) + bytes((0, 75))
+    for i, value in enumerate(calib):
+        registers[REG_CALIB_TP + i] = value
+    for i, value in enumerate(CALIB_H):
+        registers[REG_CALIB_H + i] = value
+    data = (ADC_P >> 12, (ADC_P >> 4) & 0xFF, (ADC_P & 0x0F) << 4,
+            ADC_T >> 12, (ADC_T >> 4) & 0xFF, (ADC_T & 0x0F) << 4,
+            ADC_H >> 8, ADC_H & 0xFF)
+    for i, value in enumerate(data):
+        registers[REG_DATA + i] = value
+    return registers
+
+
+class FakeDHT:
+    def measure(self):
+        time.sleep(DHT_MEASURE)
+
+    def temperature(self):
+        return 22.5
+
+    def humidity(self):
+        return 40.0
+
+
+def main(cycles=200, deadline=30):
+    i2c = FakeI2C()
+    i2c.attach(BME280_ADDR, bme280_registers())
+    i2c.attach(BME280_ADDR + 1, bme280_registers())
+
+    bme = BME280(i2c)
+    values = bme.read()
+    assert values['temperature'] == EXPECTED_TEMPERATURE, values
+    assert round(values['pressure'] * 100) == EXPECTED_PRESSURE, values
+    print(f'BME280 compensation: {values}')
+
+    bme2 = BME280(i2c, BME280_ADDR + 1)
+    bus = SensorBus(deadline=deadline)
+    for sensor in (DHTSensor(sensor=FakeDHT()), bme, bme2):
+        bus.register(sensor)
+
+    transactions = i2c.transactions
+    latencies = []
+    for _ in range(cycles):
+        payload = bus.sample()
+        latencies.append(bus.stats['latency'])
+        time.sleep(0.01)
+
+    latencies.sort()
+    print(f'cycles:              {cycles}')
+    print(f'cycle latency [ms]:  mean {sum(latencies) / cycles:.2f}  '
+          f'p50 {latencies[cycles // 2]}  max {latencies[-1]}')
+    print(f'I2C transactions:    {(i2c.transactions - transactions) / cycles:.1f} per cycle')
+    print(f'bus stats:           {bus.stats}')
+    print(f'last payload:        {payload.model_dump()}')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,140 @@
+"""
+Host-side simulation of the clock service.
+
+Drives `Clock` with a simulated MCU tick counter and DS3231 with configurable
+drift, and an NTP server which can be taken down, then reports NTP and RTC
+usage, estimated drift and the clock error.
+
+    python tools/sim_clock.py [MCU drift in ppm] [RTC drift in ppm]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from clock import Clock, MIN_SYNC_INTERVAL, from_epoch, to_epoch  # noqa: E402
+
+# real time at the start of the simulation (in ms since epoch)
+START = 1_700_000_000_000
+
+MINUTE = 60 * 1000
+DAY = 24 * 60 * MINUTE
+
+
+class World:
+    """
+    Real time shared by the simulated clocks.
+    """
+
+    def __init__(self):
+        self.now = START
+
+    def elapsed(self) -> int:
+        return self.now - START
+
+
+class SimTicks:
+    """
+    MCU tick counter running `ppm` fast (positive) or slow (negative).
+    """
+
+    def __init__(self, world: World, ppm: float):
+        self.world = world
+        self.ppm = ppm
+
+    def __call__(self) -> int:
+        return int(self.world.elapsed() * (1 + self.ppm / 1_000_000))
+
+
+class SimRTC:
+    """
+    DS3231 with 1s resolution running `ppm` fast (positive) or slow (negative).
+    """
+
+    def __init__(self, world: World, ppm: float):
+        self.world = world
+        self.ppm = ppm
+        self.offset = 0
+        self.reads = 0
+
+    def _local(self) -> float:
+        return START + self.world.elapsed() * (1 + self.ppm / 1_000_000)
+
+    def datetime(self, dt=None):
+        if dt is not None:
+            self.offset = to_epoch(dt) * 1000 - self._local()
+            return None
+        self.reads += 1
+        return from_epoch(int(self._local() + self.offset) // 1000)
+
+
+class SimNTP:
+    """
+    NTP server with 1s resolution, raises `OSError` while it is down.
+    """
+
+    def __init__(self, world: World):
+        self.world = world
+        self.up = True
+        self.calls = 0
+
+    def __call__(self) -> int:
+        self.calls += 1
+        if not self.up:
+            raise OSError(110)  # ETIMEDOUT
+        return self.world.now // 1000
+
+
+def run(world, clock, duration, step):
+    # returns the largest clock error seen (in ms)
+    worst = 0
+    end = world.now + duration
+    while world.now < end:
+        world.now += step
+        clock.maybe_sync()
+        worst = max(worst, abs(clock.now_ms() - world.now))
+    return worst
+
+
+def simulate(mcu_ppm=-50.0, rtc_ppm=2.0):
+    print(f'MCU drift {mcu_ppm} ppm, RTC drift {rtc_ppm} ppm')
+
+    # 1) NTP available: drift estimate and adaptive interval
+    world = World()
+    ntp = SimNTP(world)
+    rtc = SimRTC(world, rtc_ppm)
+    clock = Clock(rtc=rtc, ntp=ntp, ticks=SimTicks(world, mcu_ppm), diff=lambda a, b: a - b)
+    clock.sync_rtc()
+    worst = run(world, clock, 30 * DAY, MINUTE)
+    print(f'online 30 days:      {ntp.calls} NTP calls, interval {clock.interval // 1000}s, '
+          f'drift {clock.drift / 1000:.1f} ppm, RTC drift {clock.rtc_drift / 1000:.1f} ppm, '
+          f'max error {worst}ms')
+    assert ntp.calls < 30, ntp.calls
+
+    # 2) NTP goes down: the clock keeps time with the drift corrected RTC
+    ntp.up = False
+    calls = ntp.calls
+    worst = run(world, clock, 10 * DAY, MINUTE)
+    print(f'offline 10 days:     {ntp.calls - calls} NTP retries, max error {worst}ms')
+    assert ntp.calls - calls <= 10 * DAY // (MIN_SYNC_INTERVAL * 1000) + 1
+
+    # 3) NTP down at boot and no RTC: retries are spaced by the shortest interval
+    world = World()
+    ntp = SimNTP(world)
+    ntp.up = False
+    clock = Clock(ntp=ntp, ticks=SimTicks(world, mcu_ppm), diff=lambda a, b: a - b)
+    run(world, clock, 100 * 1000, 1000)
+    print(f'boot without NTP:    {ntp.calls} NTP calls in 100 calls 1s apart')
+    assert ntp.calls == 1, ntp.calls
+
+    # 4) RTC only: read once per interval, not on every call
+    world = World()
+    rtc = SimRTC(world, rtc_ppm)
+    clock = Clock(rtc=rtc, ticks=SimTicks(world, mcu_ppm), diff=lambda a, b: a - b)
+    run(world, clock, 100 * MINUTE, MINUTE)
+    print(f'RTC only:            {rtc.reads} RTC reads in 100 calls 1min apart')
+    assert rtc.reads <= 100 // (MIN_SYNC_INTERVAL // 60) + 1, rtc.reads
+
+
+if __name__ == '__main__':
+    simulate(*(float(arg) for arg in sys.argv[1:]))
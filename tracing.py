@@ -0,0 +1,424 @@
+"""tracing.py
+
+Deterministic trace recording and replay of the Device state machine.
+
+Recording (on device, opt-in): `Device(trace=Recorder("/trace.bin"))` logs settings,
+sensor readings, button events, clock ticks and state transitions into a compact
+binary trace on flash.
+
+Replay (on host, CPython): `python tracing.py trace.bin` drives the real state
+classes from the trace at full speed and reports time and memory per state. Time
+and memory are measured in separate runs, as tracemalloc slows down CPython.
+
+Trace format: header `THT\\x01`, then records of
+`type (1B) | ms since previous record (varint) | payload`.
+"""
+
+import struct
+import sys
+
+try:
+    from time import ticks_ms, ticks_diff
+except ImportError:
+    # CPython fallback
+    import time as _time
+
+    def ticks_ms():
+        return int(_time.monotonic() * 1000)
+
+    def ticks_diff(end, start):
+        return end - start
+
+MAGIC = b"THT\x01"
+
+# record types
+CLOCK = 1
+BUTTON = 2
+SENSOR = 3
+SENSOR_ERROR = 4
+SENSOR_NONE = 5
+STATE = 6
+SETTINGS = 7
+SENSOR_INFO = 8
+
+# sensor channels, the methods of DHT drivers the states look for
+MEASURE = 0
+TEMPERATURE = 1
+HUMIDITY = 2
+TEMP = 3
+HUM = 4
+CHANNELS = {"measure": MEASURE, "temperature": TEMPERATURE, "humidity": HUMIDITY, "temp": TEMP, "hum": HUM}
+
+# modules whose `time` is traced (states read clock through it)
+TIME_MODULES = ("device", "states.init", "states.diagnostics", "states.factory_reset")
+
+# records are written to flash in chunks of this size
+FLUSH_SIZE = 512
+
+
+def _varint(value):
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return out
+
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _patch_time(factory):
+    # replace `time` of traced modules by the wrapper returned by factory(time)
+    for name in TIME_MODULES:
+        try:
+            __import__(name)
+        except ImportError:
+            continue
+        module = sys.modules[name]
+        if hasattr(module, "time"):
+            module.time = factory(module.time)
+
+
+class _RecordingTime:
+    def __init__(self, time_module, recorder):
+        self._time = time_module
+        self._recorder = recorder
+
+    def time(self):
+        value = self._time.time()
+        self._recorder.record(CLOCK, struct.pack("<d", value))
+        return value
+
+    def __getattr__(self, name):
+        return getattr(self._time, name)
+
+
+class _RecordingSensor:
+    # exposes exactly the attributes of the sensor (states pick the API by
+    # hasattr()), only the channel methods are recorded
+    def __init__(self, sensor, recorder):
+        self._sensor = sensor
+        self._recorder = recorder
+        mask = 0
+        for name, channel in CHANNELS.items():
+            if hasattr(sensor, name):
+                mask |= 1 << channel
+        recorder.record(SENSOR_INFO, bytes((mask,)))
+
+    def _call(self, channel, fn):
+        try:
+            value = fn()
+        except Exception:
+            self._recorder.record(SENSOR_ERROR, bytes((channel,)))
+            raise
+        if value is None:
+            self._recorder.record(SENSOR_NONE, bytes((channel,)))
+        else:
+            self._recorder.record(SENSOR, struct.pack("<Bf", channel, value))
+        return value
+
+    def __getattr__(self, name):
+        attr = getattr(self._sensor, name)
+        channel = CHANNELS.get(name)
+        if channel is None or not callable(attr):
+            return attr
+        return lambda: self._call(channel, attr)
+
+
+class Recorder:
+    """
+    Records inputs and state transitions of the Device into binary trace file.
+    Records are buffered in RAM and written to flash in chunks.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._buf = bytearray()
+        self._last = ticks_ms()
+
+    def attach(self, device):
+        """
+        Starts recording of the device: stores settings and current state and
+        wraps the button and clock of the device. The sensor is wrapped by
+        `Device` when it is assigned (see `sensor()`).
+        """
+        import json
+
+        self.record(SETTINGS, self._str(json.dumps(device.settings)))
+        if device.state is not None:
+            self.state(device.state)
+
+        is_pressed_fn = getattr(device, "is_button_pressed", None)
+        if callable(is_pressed_fn):
+            def is_button_pressed():
+                pressed = bool(is_pressed_fn())
+                self.record(BUTTON, bytes((pressed,)))
+                return pressed
+            device.is_button_pressed = is_button_pressed
+
+        _patch_time(lambda time_module: _RecordingTime(time_module, self))
+
+    def state(self, state):
+        """Records transition to the state."""
+        self.record(STATE, self._str(type(state).__name__))
+        # transitions are rare, keep the trace on flash up to date
+        self.flush()
+
+    def sensor(self, sensor):
+        """Returns the sensor wrapped so that its readings are recorded."""
+        if sensor is None or isinstance(sensor, _RecordingSensor):
+            return sensor
+        return _RecordingSensor(sensor, self)
+
+    def record(self, kind, payload):
+        now = ticks_ms()
+        self._buf.append(kind)
+        self._buf.extend(_varint(ticks_diff(now, self._last)))
+        self._buf.extend(payload)
+        self._last = now
+        if len(self._buf) >= FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self._buf:
+            self._file.write(self._buf)
+            self._file.flush()
+            self._buf = bytearray()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    @staticmethod
+    def _str(value):
+        data = value.encode()
+        return _varint(len(data)) + data
+
+
+def read_trace(path):
+    """
+    Reads the trace file.
+    Returns list of records (type, ms since previous record, value).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != MAGIC:
+        raise ValueError("Not a trace file: " + str(path))
+
+    records = []
+    pos = 4
+    while pos < len(data):
+        kind = data[pos]
+        dt, pos = _read_varint(data, pos + 1)
+        if kind == CLOCK:
+            value = struct.unpack_from("<d", data, pos)[0]
+            pos += 8
+        elif kind == BUTTON:
+            value = bool(data[pos])
+            pos += 1
+        elif kind == SENSOR:
+            value = struct.unpack_from("<Bf", data, pos)
+            pos += 5
+        elif kind in (SENSOR_ERROR, SENSOR_NONE, SENSOR_INFO):
+            value = data[pos]
+            pos += 1
+        elif kind in (STATE, SETTINGS):
+            length, pos = _read_varint(data, pos)
+            value = data[pos:pos + length].decode()
+            pos += length
+        else:
+            raise ValueError("Unknown record type {} at offset {}".format(kind, pos))
+        records.append((kind, dt, value))
+    return records
+
+
+class TraceExhausted(SystemExit):
+    """Replay ran out of recorded inputs. Stops Device.run like a restart request."""
+
+
+# recorded sensor error in the replay queue
+_ERROR = object()
+
+
+class _ReplayInputs:
+    def __init__(self, records):
+        self.clock = []
+        self.button = []
+        self.sensor = {channel: [] for channel in CHANNELS.values()}
+        # channel masks of the sensors in order of creation
+        self.sensors = []
+        self.states = []
+        self.settings = None
+        for kind, _, value in records:
+            if kind == CLOCK:
+                self.clock.append(value)
+            elif kind == BUTTON:
+                self.button.append(value)
+            elif kind == SENSOR:
+                self.sensor[value[0]].append(value[1])
+            elif kind == SENSOR_ERROR:
+                self.sensor[value].append(_ERROR)
+            elif kind == SENSOR_NONE:
+                self.sensor[value].append(None)
+            elif kind == SENSOR_INFO:
+                self.sensors.append(value)
+            elif kind == STATE:
+                self.states.append(value)
+            elif kind == SETTINGS and self.settings is None:
+                import json
+                self.settings = json.loads(value)
+        # consumed from the front
+        for queue in (self.clock, self.button, self.sensors, *self.sensor.values()):
+            queue.reverse()
+
+    @staticmethod
+    def take(queue, what):
+        if not queue:
+            raise TraceExhausted("trace exhausted: " + what)
+        return queue.pop()
+
+
+class _ReplayTime:
+    def __init__(self, time_module, inputs):
+        self._time = time_module
+        self._inputs = inputs
+
+    def time(self):
+        return _ReplayInputs.take(self._inputs.clock, "clock")
+
+    def sleep(self, seconds):
+        # full speed replay
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._time, name)
+
+
+class _ReplaySensor:
+    # has the same channel methods as the recorded sensor
+    def __init__(self, inputs, mask):
+        self._inputs = inputs
+        self._mask = mask
+
+    def _take(self, channel):
+        value = _ReplayInputs.take(self._inputs.sensor[channel], "sensor")
+        if value is _ERROR:
+            raise OSError("recorded sensor error")
+        return value
+
+    def __getattr__(self, name):
+        channel = CHANNELS.get(name)
+        if channel is None or not self._mask & (1 << channel):
+            raise AttributeError(name)
+        return lambda: self._take(channel)
+
+
+def replay(path, memory=False):
+    """
+    Replays the trace through the real Device and state classes.
+    Returns report: visited states, recorded states and per-state statistics
+    (visits, time in ns). With `memory`, the replay runs under tracemalloc and
+    the statistics contain net memory growth and peak memory in bytes instead,
+    as the time measured under tracemalloc is not representative.
+    """
+    import time
+    import tracemalloc
+
+    from device import Device
+
+    inputs = _ReplayInputs(read_trace(path))
+    stats = {}
+    visited = []
+    current = {"name": None, "start": 0, "size": 0}
+
+    def leave(now):
+        name = current["name"]
+        if name is None:
+            return
+        entry = stats.setdefault(name, {"visits": 0})
+        entry["visits"] += 1
+        if memory:
+            size, peak = tracemalloc.get_traced_memory()
+            entry["growth"] = entry.get("growth", 0) + size - current["size"]
+            entry["peak"] = max(entry.get("peak", 0), peak - current["size"])
+        else:
+            entry["time_ns"] = entry.get("time_ns", 0) + now - current["start"]
+
+    def enter(state):
+        name = type(state).__name__
+        visited.append(name)
+        current["name"] = name
+        if memory:
+            tracemalloc.reset_peak()
+            current["size"] = tracemalloc.get_traced_memory()[0]
+        current["start"] = time.perf_counter_ns()
+
+    class ReplayDevice(Device):
+        def change_state(self, new_state):
+            leave(time.perf_counter_ns())
+            super().change_state(new_state)
+            enter(new_state)
+
+        def create_dht_sensor(self):
+            # sensor is created by the states as in the recorded run
+            if not inputs.sensors:
+                raise OSError("no sensor in the recording")
+            return _ReplaySensor(inputs, inputs.sensors.pop())
+
+        def remove_settings(self):
+            # never touch files of the host
+            pass
+
+    if memory:
+        tracemalloc.start()
+    try:
+        device = ReplayDevice()
+        device.settings = inputs.settings
+        if inputs.button:
+            device.is_button_pressed = lambda: _ReplayInputs.take(inputs.button, "button")
+        _patch_time(lambda time_module: _ReplayTime(time_module, inputs))
+        enter(device.state)
+        try:
+            device.run()
+        finally:
+            leave(time.perf_counter_ns())
+            _patch_time(lambda traced: traced._time)
+    finally:
+        if memory:
+            tracemalloc.stop()
+
+    return {"visited": visited, "recorded": inputs.states, "states": stats}
+
+
+def main(argv):
+    if len(argv) != 2:
+        print("usage: python tracing.py <trace file>")
+        return 2
+    report = replay(argv[1])
+    memory = replay(argv[1], memory=True)["states"]
+    print("{:<20} {:>7} {:>12} {:>12} {:>12}".format("state", "visits", "time [us]", "growth [B]", "peak [B]"))
+    for name, entry in report["states"].items():
+        mem = memory.get(name, {})
+        print("{:<20} {:>7} {:>12.1f} {:>12} {:>12}".format(
+            name, entry["visits"], entry["time_ns"] / 1000, mem.get("growth", "-"), mem.get("peak", "-")))
+    if report["visited"] != report["recorded"]:
+        print("Transitions differ from the recording:")
+        print("  recorded:", " -> ".join(report["recorded"]))
+        print("  replayed:", " -> ".join(report["visited"]))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))